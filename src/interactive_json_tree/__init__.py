@@ -1,8 +1,10 @@
-import html
+import io
+import json
 import uuid
+from collections import OrderedDict
 from collections.abc import Mapping, Sequence
 from itertools import islice
-from typing import Optional
+from typing import Iterator, Optional
 
 
 class JSON:
@@ -25,12 +27,37 @@ class JSON:
         The maximum number of children to display for a node before truncating.
     max_string_length : int, default=2000
         The maximum length for string values before truncating.
+    check_cycles : bool, default=False
+        Track every container visited and render repeats as ``[Circular]``. Output of
+        ``json.loads`` never contains cycles or shared containers, so this is off by
+        default. Without it, a container referenced from several places is rendered in
+        full at each of them, so data that nests shared subtrees can blow up
+        exponentially (``a = [a, a]`` twenty times over is hundreds of MB of HTML).
+        Tracking also switches on by itself once nesting reaches 256 levels, for an
+        unbounded self-referencing structure, and then stays on for the rest of the
+        document. Turn it on for hand-built structures that may refer to themselves
+        or share subtrees.
+    lazy : bool, default=False
+        Leave the contents of initially collapsed nodes out of the HTML and render them
+        in the browser when the node is first opened, which makes large trees much
+        faster to render. Only use it where the output's scripts run: untrusted
+        notebooks, GitHub previews and other sanitizing viewers strip them, and
+        collapsed nodes then show just "...". Ignored when ``check_cycles`` is set.
+
+    Notes
+    -----
+    Rendering is deferred until the HTML is first requested (by ``_repr_html_`` or the
+    ``rendered`` attribute) and the result is cached. Iterating over the object yields
+    the HTML in fragments instead, so large trees can be written to a file or socket
+    without materializing one big string.
 
     Examples
     --------
     >>> from interactive_json_tree import JSON
     >>> data = {"name": "example", "values": [1, 2, 3], "nested": {"a": 1, "b": 2}}
     >>> JSON(data)
+    >>> with open("tree.html", "w") as f:
+    ...     f.writelines(JSON(data))
     """
 
     def __init__(
@@ -40,16 +67,39 @@ class JSON:
         expand_depth: int = 1,
         max_children: int = 100,
         max_string_length: int = 2000,
+        check_cycles: bool = False,
+        lazy: bool = False,
     ):
         self.data = data
         self.expand_depth = expand_depth
         self.max_children = max_children
         self.max_string_length = max_string_length
-        self.rendered = json_to_html_tree(
+        self.check_cycles = check_cycles
+        self.lazy = lazy
+        self._rendered = None
+
+    @property
+    def rendered(self) -> str:
+        """The complete HTML for the tree, rendered on first access."""
+        if self._rendered is None:
+            self._rendered = json_to_html_tree(
+                self.data,
+                expand_depth=self.expand_depth,
+                max_children=self.max_children,
+                max_string_length=self.max_string_length,
+                check_cycles=self.check_cycles,
+                lazy=self.lazy,
+            )
+        return self._rendered
+
+    def __iter__(self) -> Iterator[str]:
+        return _iter_html(
             self.data,
             expand_depth=self.expand_depth,
             max_children=self.max_children,
             max_string_length=self.max_string_length,
+            check_cycles=self.check_cycles,
+            lazy=self.lazy,
         )
 
     def _repr_html_(self):
@@ -60,9 +110,491 @@ class JSON:
 #############################################################################
 
 _INDENT_REM = 0.5  # indent step per level (in rem)
+# Without `check_cycles` a container nested this deep starts cycle tracking anyway, so a
+# self-referencing structure still renders (with a deep but finite unrolling) instead
+# of growing the work stack forever. Tracking then stays on for the rest of the document:
+# every container rendered after that point, at any depth, is remembered, so a later
+# repeat of a shared container shows as `[Circular]` (`[deep, s, s]` does this for the
+# second `s`, `[s, s]` does not). Tracking never starts for shared but acyclic data that
+# stays shallower; each reference is rendered in full.
+_UNCHECKED_MAX_LEVEL = 256
+_STREAM_CHUNK = 4096  # fragments buffered per chunk when streaming with `_iter_html`
+
+# Indentation is applied through per-level classes (`jt-l0` ... `jt-l63`) defined once in
+# the stylesheet, so rows carry a short class name instead of an inline style. Deeper
+# levels fall back to an inline `margin-left`. `_LEVEL_ATTRS[i]` finishes a `class="..."`
+# attribute for level `i`. Only the rules for levels a document uses are emitted (see
+# `_level_rules`), so small trees don't carry all 64.
+_LEVEL_CLASSES = 64
+_LEVEL_ATTRS = tuple(f' jt-l{i}"' for i in range(_LEVEL_CLASSES))
+_LEVEL_RULES = tuple(
+    f"#%(uid)s .jt-l{i} {{ margin-left: {i * _INDENT_REM}rem; }}\n" for i in range(_LEVEL_CLASSES)
+)
+
+# The stylesheet only varies by the root element's id, so it is formatted from a
+# module-level template rather than rebuilt rule by rule on every render.
+_STYLE_TEMPLATE = """
+<style>
+#%(uid)s {
+  font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace;
+  font-size: 13px; line-height: 1.45;
+}
+#%(uid)s summary {
+  cursor: pointer;
+  list-style: none;
+  display: inline-flex;
+  align-items: baseline;
+  gap: 0.25rem;
+}
+#%(uid)s summary::-webkit-details-marker { display: none; }
+#%(uid)s .jt-summary::before {
+  content: "▸";
+  display: inline-block;
+  width: 1em;
+  color: #94a3b8;
+}
+#%(uid)s details[open] > .jt-summary::before { content: "▾"; }
+
+#%(uid)s .jt-key   { color: #1f2937; }
+#%(uid)s .jt-punct { color: #94a3b8; }
+#%(uid)s .jt-str   { color: #059669; }
+#%(uid)s .jt-str-trunc { color: #dc2626; }
+#%(uid)s .jt-num   { color: #b45309; }
+#%(uid)s .jt-bool  { color: #2563eb; }
+#%(uid)s .jt-null  { color: #dc2626; }
+#%(uid)s .jt-more  { color: #94a3b8; }
+@media (prefers-color-scheme: dark) {
+  #%(uid)s .jt-key { color: #e5e7eb; }
+  #%(uid)s .jt-str-trunc { color: #f87171; }
+  #%(uid)s .jt-more { color: #64748b; }
+}
+%(levels)s</style>
+"""
+
+_LEAF_OPEN = '<div class="jt-leaf'
+_LEAF_MID = ">"
+_LEAF_CLOSE = "</div>"
+
+
+def _level_rules(uid, deepest):
+    """The `jt-l*` rules for levels 0 to `deepest` of the tree with root id `uid`."""
+    return "".join(_LEVEL_RULES[: deepest + 1]) % {"uid": uid}
+
+
+def _level_attrs(level):
+    if level < _LEVEL_CLASSES:
+        return _LEVEL_ATTRS[level]
+    return f'" style="margin-left:{level * _INDENT_REM}rem"'
+
+
+# Work-stack phases for the iterative walker in `_to_html`.
+_ENTER = 0  # render the node: emit its opening HTML, push its children
+_EMIT = 1  # `obj` is ready-made HTML (closing tag, deferred leaf row); emit it verbatim
+_ENTER_EAGER = 2  # like _ENTER, inside a subtree `_lazy_encode` gave up on: don't defer
+
+
+# Only "&", "<" and ">" need escaping in element content. Most text contains none of
+# them, so `_esc` checks for them first (each `in` is a memchr scan) and returns such
+# strings as they are.
+# Text that does need escaping is memoized: the same dict keys and enum-like values
+# recur across every row of a typical payload. Long strings skip the memo so they
+# don't crowd out the short, frequently repeated ones.
+_ESC_CACHE_SIZE = 4096
+_ESC_CACHE_MAX_LEN = 256
+_esc_cache = OrderedDict()
+
+
+def _cache_put(cache, key, value, limit):
+    """Insert into a bounded memo, evicting the oldest entry once `limit` is reached.
+
+    Memos are `OrderedDict`s: deleting the first key of a plain dict leaves a dead slot
+    that every later `next(iter(...))` has to skip, so FIFO eviction degrades until the
+    dict resizes, while `popitem(last=False)` stays O(1).
+    """
+    if len(cache) >= limit:
+        cache.popitem(last=False)
+    cache[key] = value
+
+
+def _escape_text(s):
+    """Same result as `html.escape(s, quote=False)`, but only rewrites characters present in `s`.
+
+    Long string values rarely contain more than one kind of special character, so the
+    `replace` passes for the others (each a full scan) are skipped.
+    """
+    if "&" in s:
+        s = s.replace("&", "&amp;")
+    if "<" in s:
+        s = s.replace("<", "&lt;")
+    if ">" in s:
+        s = s.replace(">", "&gt;")
+    return s
+
+
+def _esc(x):
+    s = str(x)
+    if len(s) > _ESC_CACHE_MAX_LEN:
+        return _escape_text(s)
+    if "&" not in s and "<" not in s and ">" not in s:
+        return s
+    r = _esc_cache.get(s)
+    if r is None:
+        r = _escape_text(s)
+        _cache_put(_esc_cache, s, r, _ESC_CACHE_SIZE)
+    return r
+
+
+# String key prefixes are memoized whole. Non-string mapping keys are rare and are
+# formatted directly: keys like 1, 1.0 and True hash alike but print differently.
+# Prefixes for the first `_INDEX_PREFIX_COUNT` list indices are built once up front;
+# longer lists format the rest directly rather than churning a memo.
+_KEY_PREFIX_CACHE_SIZE = 4096
+_key_prefix_cache = OrderedDict()
+_INDEX_PREFIX_COUNT = 4096
+_INDEX_PREFIXES = tuple(
+    f'<span class="jt-key">[{i}]</span><span class="jt-punct">: </span>' for i in range(_INDEX_PREFIX_COUNT)
+)
+
+
+def _key_prefix_html(k, is_index):
+    if k is None:
+        return ""
+    if is_index:
+        if k < _INDEX_PREFIX_COUNT:
+            return _INDEX_PREFIXES[k]
+        return f'<span class="jt-key">[{k}]</span><span class="jt-punct">: </span>'
+    if type(k) is not str:
+        return f'<span class="jt-key">"{_esc(k)}"</span><span class="jt-punct">: </span>'
+    r = _key_prefix_cache.get(k)
+    if r is None:
+        r = f'<span class="jt-key">"{_esc(k)}"</span><span class="jt-punct">: </span>'
+        _cache_put(_key_prefix_cache, k, r, _KEY_PREFIX_CACHE_SIZE)
+    return r
+
+
+# Number fragments are memoized by (type, value): enum-like ints and repeated floats are
+# common in columns of data. NaN never compares equal and 0.0 == -0.0, so neither is
+# stored. Strings are not cached here; their escaping already goes through `_esc`.
+# The memo stops growing once full instead of evicting, so a column of unique values
+# doesn't pay for an insert and an eviction per cell that never hit. A full memo is
+# cleared when the next render starts (see `_to_html`).
+_PRIM_CACHE_SIZE = 2048
+_prim_cache = OrderedDict()
+
+
+def _fmt_primitive(v, max_string_length):
+    t = type(v)
+    if t is int or t is float:
+        cache_key = (t, v)
+        r = _prim_cache.get(cache_key)
+        if r is None:
+            r = f'<span class="jt-num">{v}</span>'
+            if len(_prim_cache) < _PRIM_CACHE_SIZE and (t is int or (v == v and v != 0)):
+                _prim_cache[cache_key] = r
+        return r
+    if t is bool:
+        return '<span class="jt-bool">true</span>' if v else '<span class="jt-bool">false</span>'
+    if isinstance(v, str):
+        if (
+            max_string_length is not None
+            and max_string_length >= 0
+            and len(v) > max_string_length
+        ):
+            truncated = v[:max_string_length]
+            return f'<span class="jt-str jt-str-trunc">"{_esc(truncated)}..."</span>'
+        return f'<span class="jt-str">"{_esc(v)}"</span>'
+    if v is None:
+        return '<span class="jt-null">null</span>'
+    if isinstance(v, (int, float)):
+        return f'<span class="jt-num">{v}</span>'
+    return f"<span>{_esc(repr(v))}</span>"
+
+
+# Whole leaf rows of dicts are memoized by (level, key, type, value): in list-of-records
+# data the same key/value pair at the same depth recurs across many rows. Only str keys
+# (see `_key_prefix_html`), short strings, and floats other than NaN and +-0.0 are
+# cached; the markup doesn't depend on the root id, so one process-wide memo is safe.
+# Like `_prim_cache`, it stops growing once full and is cleared when the next render
+# starts, so mostly unique values cost a lookup per row but no eviction.
+_LEAF_CACHE_SIZE = 16384
+_LEAF_CACHE_MAX_STR = 64
+_leaf_cache = OrderedDict()
+
+
+# Exact types that real JSON is made of. Checking `type(v)` against these is a pointer
+# compare; the Mapping/Sequence ABC checks only run for anything else.
+_LEAF_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _is_container(v):
+    return isinstance(v, Mapping) or (
+        isinstance(v, Sequence) and not isinstance(v, (str, bytes, bytearray))
+    )
+
+
+_NUMBER_TYPES = frozenset({int, float})
+
+
+def _emit_number_rows(values, start, stop, leaf_open, out):
+    """Emit rows `start` to `stop` of a list whose visible items are all plain ints/floats."""
+    append = out.append
+    for i, v in enumerate(values[start:stop], start):
+        prefix = _INDEX_PREFIXES[i] if i < _INDEX_PREFIX_COUNT else _key_prefix_html(i, True)
+        append(f'{leaf_open}{prefix}<span class="jt-num">{v}</span>{_LEAF_CLOSE}')
+
+
+# Lists of flat records (same str keys in the same order, primitive values) get a row
+# renderer generated per schema with `exec`: a straight-line function that formats a
+# whole row in one f-string, instead of a trip through the walker for every cell.
+_TABLE_MIN_ROWS = 8
+_TABLE_SAMPLE_ROWS = 3
+_TABLE_MAX_COLUMNS = 256
+_ROW_TEMPLATE_CACHE_SIZE = 256
+_row_template_cache = OrderedDict()
+
+
+def _table_keys(rows, visible, max_children):
+    """Return the shared key tuple if the first rows of `rows` are flat records, else None."""
+    if visible < _TABLE_MIN_ROWS:
+        return None
+    first = rows[0]
+    if type(first) is not dict:
+        return None
+    keys = tuple(first)
+    if not keys or len(keys) > _TABLE_MAX_COLUMNS:
+        return None
+    if max_children is not None and 0 <= max_children < len(keys):
+        return None
+    # Only str keys, as for the key prefix memo (see `_key_prefix_html`).
+    if set(map(type, keys)) != {str} or not set(map(type, first.values())) <= _LEAF_TYPES:
+        return None
+    for row in islice(rows, 1, _TABLE_SAMPLE_ROWS):
+        if type(row) is not dict or tuple(row) != keys:
+            return None
+    return keys
+
+
+def _row_template(keys, numeric, level, is_open, max_string_length):
+    cache_key = (keys, numeric, level, is_open, max_string_length)
+    fn = _row_template_cache.get(cache_key)
+    if fn is None:
+        fn = _compile_row_template(keys, numeric, level, is_open, max_string_length)
+        _cache_put(_row_template_cache, cache_key, fn, _ROW_TEMPLATE_CACHE_SIZE)
+    return fn
+
+
+def _compile_row_template(keys, numeric, level, is_open, max_string_length):
+    """
+    Build `row_html(i, row)` rendering one record at `level` exactly like the walker would.
+
+    `numeric[j]` marks columns sampled as int/float; those cells are formatted inline
+    (behind a type guard) instead of calling `_fmt_primitive`. Returns None for a row
+    holding a non-primitive value so the caller can fall back to the walker. Keys and
+    markup are bound in the function's namespace; none of them appear in the source.
+    """
+    leaf_open = _LEAF_OPEN + _level_attrs(level + 1) + _LEAF_MID
+    ns = {
+        "_LEAF_TYPES": _LEAF_TYPES,
+        "_NUMBER_TYPES": _NUMBER_TYPES,
+        "_fmt": _fmt_primitive,
+        "_msl": max_string_length,
+        "_index_prefixes": _INDEX_PREFIXES,
+        "_index_prefix_count": _INDEX_PREFIX_COUNT,
+        "_key_prefix_html": _key_prefix_html,
+        "_num_open": '<span class="jt-num">',
+        "_span_close": "</span>",
+        "_head": (
+            f'<details class="jt-details{_level_attrs(level)}{" open" if is_open else ""}>'
+            '<summary class="jt-summary">'
+        ),
+        "_end": _LEAF_CLOSE + "</details>",
+    }
+    summary_tail = f'{{}} Object <span class="jt-punct">({len(keys)})</span></summary>'
+    values = ", ".join(f"v{j}" for j in range(len(keys)))
+    lines = [
+        "def row_html(i, row):",
+        f"    {values}, = row.values()",
+        f"    if not {{{', '.join(f'type(v{j})' for j in range(len(keys)))}}} <= _LEAF_TYPES:",
+        "        return None",
+    ]
+    body = ["{_head}{_index_prefixes[i] if i < _index_prefix_count else _key_prefix_html(i, True)}"]
+    for j, k in enumerate(keys):
+        sep = summary_tail if j == 0 else _LEAF_CLOSE
+        ns[f"_s{j}"] = sep + leaf_open + _key_prefix_html(k, False)
+        if numeric[j]:
+            lines.append(
+                f'    c{j} = f"{{_num_open}}{{v{j}}}{{_span_close}}" '
+                f"if type(v{j}) in _NUMBER_TYPES else _fmt(v{j}, _msl)"
+            )
+        else:
+            lines.append(f"    c{j} = _fmt(v{j}, _msl)")
+        body.append(f"{{_s{j}}}{{c{j}}}")
+    body.append("{_end}")
+    lines.append(f'    return f"{"".join(body)}"')
+    exec("\n".join(lines), ns)
+    return ns["row_html"]
+
+
+def _emit_table_rows(rows, start, stop, keys, row_html, out):
+    """Emit rows `start` to `stop` of `rows` while `row_html` can render them.
+
+    Returns the index of the first row not emitted (`stop` if all of them were).
+    """
+    append = out.append
+    for i, row in enumerate(rows[start:stop], start):
+        if type(row) is not dict or tuple(row) != keys:
+            return i
+        row_out = row_html(i, row)
+        if row_out is None:
+            return i
+        append(row_out)
+    return stop
+
+
+# Collapsed nodes in lazy mode are sent to the browser as compact JSON instead of HTML
+# and rendered by `_LAZY_SCRIPT` when first opened. Encoding, with leaves written as-is
+# where JavaScript would print them the same way (the markup the script duplicates is
+# listed in `_to_html`):
+#   [0, size, item, ...]        array (first `max_children` items)
+#   [1, size, key, value, ...]  object, keys already str()-ed (None: no key shown)
+#   [2, text]                   number, formatted by Python (floats, unsafe ints)
+#   [3, html]                   any other leaf, pre-rendered by `_fmt_primitive`
+_JS_MAX_SAFE_INT = 2**53 - 1
+
+_LAZY_PLACEHOLDER = '<div class="jt-more jt-lazy%s><em>...</em></div></details>'
+
+_LAZY_SCRIPT = """
+(function () {
+  function esc(s) {
+    return s.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;");
+  }
+  function attrs(level) {
+    if (level < %(level_classes)s) return " jt-l" + level + '"';
+    var rem = level * %(indent_rem)s;
+    return '" style="margin-left:' + (Math.floor(rem) === rem ? rem.toFixed(1) : rem) + 'rem"';
+  }
+  function leaf(v) {
+    if (v === null) return '<span class="jt-null">null</span>';
+    if (typeof v === "boolean") return '<span class="jt-bool">' + v + "</span>";
+    if (typeof v === "number") return '<span class="jt-num">' + v + "</span>";
+    if (typeof v === "string") return '<span class="jt-str">"' + esc(v) + '"</span>';
+    if (v[0] === 2) return '<span class="jt-num">' + v[1] + "</span>";
+    return v[1];
+  }
+  function visible(n) {
+    return n[0] === 1 ? (n.length - 2) / 2 : n.length - 2;
+  }
+  function details(nodes, level, prefix, n) {
+    var size = n[1], shown = visible(n);
+    return '<details class="jt-details' + attrs(level) +
+      (size > 0 ? ' data-jt-lazy="' + (nodes.push([level, n]) - 1) + '"' : "") +
+      '><summary class="jt-summary">' + prefix + (n[0] === 1 ? "{} Object " : "[] Array ") +
+      '<span class="jt-punct">(' + (shown !== size ? shown + "/" + size : size) + ")</span></summary></details>";
+  }
+  function children(nodes, level, n) {
+    var isMap = n[0] === 1, rowAttrs = attrs(level + 1), out = [], i = 2, index = 0;
+    while (i < n.length) {
+      var k = isMap ? n[i++] : index;
+      var prefix = k === null ? "" : '<span class="jt-key">' + (isMap ? '"' + esc(k) + '"' : "[" + k + "]") +
+        '</span><span class="jt-punct">: </span>';
+      var v = n[i++];
+      index++;
+      if (v !== null && typeof v === "object" && v[0] < 2) out.push(details(nodes, level + 1, prefix, v));
+      else out.push('<div class="jt-leaf' + rowAttrs + ">" + prefix + leaf(v) + "</div>");
+    }
+    var more = n[1] - visible(n);
+    if (more > 0) {
+      out.push('<div class="jt-more' + rowAttrs + "><em>... " + more + " more item" +
+        (more !== 1 ? "s" : "") + "</em></div>");
+    }
+    return out.join("");
+  }
+  function init(root) {
+    if (root.jtLazy) return;
+    root.jtLazy = true;
+    var nodes = JSON.parse(root.querySelector("script.jt-data").textContent);
+    root.addEventListener("toggle", function (event) {
+      var el = event.target, id = el.getAttribute("data-jt-lazy");
+      if (!el.open || id === null) return;
+      el.removeAttribute("data-jt-lazy");
+      var placeholder = el.lastElementChild;
+      if (placeholder && placeholder.classList.contains("jt-lazy")) el.removeChild(placeholder);
+      el.insertAdjacentHTML("beforeend", children(nodes, nodes[id][0], nodes[id][1]));
+    }, true);
+  }
+  // Without `currentScript` (e.g. HTML inserted by eval in classic notebooks) the root
+  // is found by id. A cached `_repr_html_` shown twice repeats that id, so every copy
+  // on the page is set up, not just the first.
+  var script = document.currentScript;
+  var roots = script ? [script.parentNode] : document.querySelectorAll('div[id="%(uid)s"]');
+  for (var i = 0; i < roots.length; i++) init(roots[i]);
+})();
+"""
+
+
+def _lazy_encode(obj, level, max_children, max_string_length):
+    """
+    Encode the subtree of the collapsed container `obj` (at `level`) for `_LAZY_SCRIPT`.
+
+    Returns `(encoded, deepest)`, where `deepest` is the deepest level the browser will
+    render rows at, or None if the subtree reaches `_UNCHECKED_MAX_LEVEL`; such input
+    may be cyclic, so the caller renders it eagerly, where cycle tracking kicks in.
+    """
+    limit = max_children is not None and max_children >= 0
+    encoded = []
+    deepest = level
+    stack = [(obj, encoded, level)]
+    while stack:
+        node, dst, node_level = stack.pop()
+        if node_level >= _UNCHECKED_MAX_LEVEL:
+            return None
+        if node_level > deepest:
+            deepest = node_level
+        t = type(node)
+        is_map = t is dict or (t is not list and t is not tuple and isinstance(node, Mapping))
+        dst.append(1 if is_map else 0)
+        dst.append(len(node))
+        if is_map:
+            items = islice(node.items(), max_children) if limit else node.items()
+        else:
+            items = islice(node, max_children) if limit else node
+        for v in items:
+            if is_map:
+                k, v = v
+                dst.append(k if type(k) is str or k is None else str(k))
+            t = type(v)
+            if t is str:
+                if max_string_length is None or max_string_length < 0 or len(v) <= max_string_length:
+                    dst.append(v)
+                else:
+                    dst.append([3, _fmt_primitive(v, max_string_length)])
+            elif t is bool or v is None:
+                dst.append(v)
+            elif t is int:
+                dst.append(v if -_JS_MAX_SAFE_INT <= v <= _JS_MAX_SAFE_INT else [2, str(v)])
+            elif t is float:
+                dst.append([2, f"{v}"])
+            elif t is dict or t is list or t is tuple or (t not in _LEAF_TYPES and _is_container(v)):
+                child = []
+                dst.append(child)
+                stack.append((v, child, node_level + 1))
+            else:
+                dst.append([3, _fmt_primitive(v, max_string_length)])
+    return encoded, deepest + 1
+
+
+def _lazy_scripts_html(uid, deferred):
+    """The data and loader scripts that expand the nodes collected in `deferred`."""
+    payload = json.dumps(deferred, ensure_ascii=False, separators=(",", ":"))
+    # Keep "</script>" (or "<!--") inside strings from ending the data block early.
+    payload = payload.replace("<", "\\u003c")
+    script = _LAZY_SCRIPT % {"uid": uid, "indent_rem": _INDENT_REM, "level_classes": _LEVEL_CLASSES}
+    return f'<script type="application/json" class="jt-data">{payload}</script><script>{script}</script>'
+
 
 def _to_html(
     obj,
+    out,
     *,
     expand_depth=1,
     level=0,
@@ -71,191 +603,223 @@ def _to_html(
     key_is_index=False,
     max_children=100,
     max_string_length=2000,
+    chunk_size=None,
+    deferred=None,
 ):
     """
-    Render `obj` as a <details>/<summary> tree.
+    Render `obj` as a <details>/<summary> tree, appending HTML fragments to `out`.
     - key/key_is_index: when this node is a child, include its key/index inline in <summary>.
     - expand_depth: >0 => node starts open; pass (expand_depth-1) to children.
     - level: used only for computing indent (applied to child rows).
+    - seen: set of container ids for circular-ref detection, or None to skip tracking.
+    - deferred: list collecting `[level, encoded]` for collapsed nodes left to the
+      browser (see `_lazy_encode`), or None to render everything eagerly.
+
+    The tree is walked with an explicit stack of
+    `(obj, level, key, key_is_index, expand_depth, phase)` entries rather than by
+    recursion, so deeply nested input cannot hit the recursion limit. Fragments are
+    appended to the caller's `out` list, which is joined once for the whole document.
+
+    This is a generator so the output can be streamed: with `chunk_size` set it yields
+    whenever `out` holds at least that many fragments, also partway through a wide
+    container's children, and the caller drains `out` before resuming. Without it, it
+    runs to completion on the first `next()`. Its return value (`StopIteration.value`)
+    is the deepest level any row is indented at, for `_level_rules`.
     """
-    if seen is None:
-        seen = set()
-
-    def esc(x):
-        return html.escape(str(x), quote=False)
-
-    def key_prefix_html(k, is_index):
-        if k is None:
-            return ""
-        if is_index:
-            return f'<span class="jt-key">[{k}]</span><span class="jt-punct">: </span>'
-        return f'<span class="jt-key">"{esc(k)}"</span><span class="jt-punct">: </span>'
-
-    def fmt_primitive(v):
-        if isinstance(v, str):
-            if (
-                max_string_length is not None
-                and max_string_length >= 0
-                and len(v) > max_string_length
-            ):
-                truncated = v[:max_string_length]
-                return f'<span class="jt-str jt-str-trunc">"{esc(truncated)}..."</span>'
-            return f'<span class="jt-str">"{esc(v)}"</span>'
-        if v is None:
-            return '<span class="jt-null">null</span>'
-        if isinstance(v, bool):
-            return f'<span class="jt-bool">{"true" if v else "false"}</span>'
-        if isinstance(v, (int, float)):
-            return f'<span class="jt-num">{v}</span>'
-        return f"<span>{esc(repr(v))}</span>"
-
-    is_map = isinstance(obj, Mapping)
-    is_seq = isinstance(obj, Sequence) and not isinstance(obj, (str, bytes, bytearray))
-
-    # Only track containers for circular refs
-    if is_map or is_seq:
-        oid = id(obj)
-        if oid in seen:
-            return '<div class="jt-leaf"><em>[Circular]</em></div>'
-        seen.add(oid)
-
-    # ----- dict -----
-    if is_map:
-        size = len(obj)
-        visible = size
-        if max_children is not None and max_children >= 0:
-            visible = min(size, max_children)
-        open_attr = " open" if expand_depth > 0 else ""
-        # If this dict is a child, show the key inline in its summary
-        count_display = f"{visible}/{size}" if visible != size else str(size)
-        summary_label = (
-            f'{key_prefix_html(key, key_is_index)}{{}} Object '
-            f'<span class="jt-punct">({count_display})</span>'
-        )
-        # Build children
-        rows = []
-        items_iter = obj.items()
-        if max_children is not None and max_children >= 0:
-            items_iter = islice(items_iter, max_children)
-        for k, v in items_iter:
-            if isinstance(v, Mapping):
-                # child container (dict): put key in child's <summary>, indent that <details>
-                rows.append(
-                    _to_html(
-                        v,
-                        expand_depth=max(expand_depth - 1, 0),
-                        level=level + 1,
-                        seen=seen,
-                        key=k,
-                        key_is_index=False,
-                        max_children=max_children,
-                        max_string_length=max_string_length,
-                    )
-                )
-            elif isinstance(v, Sequence) and not isinstance(v, (str, bytes, bytearray)):
-                # child container (list)
-                rows.append(
-                    _to_html(
-                        v,
-                        expand_depth=max(expand_depth - 1, 0),
-                        level=level + 1,
-                        seen=seen,
-                        key=k,
-                        key_is_index=False,
-                        max_children=max_children,
-                        max_string_length=max_string_length,
-                    )
-                )
-            else:
-                # primitive child -> single line
-                rows.append(
-                    f'<div class="jt-leaf" style="margin-left:{(level + 1) * _INDENT_REM}rem">'
-                    f"{key_prefix_html(k, False)}{fmt_primitive(v)}</div>"
-                )
-        if size > visible:
-            remaining = size - visible
-            rows.append(
-                f'<div class="jt-more" style="margin-left:{(level + 1) * _INDENT_REM}rem">'
-                f"<em>... {remaining} more item{'s' if remaining != 1 else ''}</em></div>"
-            )
-        return (
-            f'<details class="jt-details"{open_attr} style="margin-left:{level * _INDENT_REM}rem">'
-            f'<summary class="jt-summary">{summary_label}</summary>'
-            + "".join(rows)
-            + "</details>"
-        )
+    if len(_prim_cache) >= _PRIM_CACHE_SIZE:
+        _prim_cache.clear()
+    if len(_leaf_cache) >= _LEAF_CACHE_SIZE:
+        _leaf_cache.clear()
+    # Longer strings could render differently under another `max_string_length`.
+    leaf_cache_str_len = _LEAF_CACHE_MAX_STR
+    if max_string_length is not None and 0 <= max_string_length < leaf_cache_str_len:
+        leaf_cache_str_len = max_string_length
 
-    # ----- list/tuple -----
-    if is_seq:
-        size = len(obj)
-        visible = size
-        if max_children is not None and max_children >= 0:
-            visible = min(size, max_children)
-        open_attr = " open" if expand_depth > 0 else ""
-        count_display = f"{visible}/{size}" if visible != size else str(size)
-        summary_label = (
-            f'{key_prefix_html(key, key_is_index)}[] Array '
-            f'<span class="jt-punct">({count_display})</span>'
-        )
-        rows = []
-        iterable = obj
-        if max_children is not None and max_children >= 0:
-            iterable = islice(enumerate(obj), max_children)
+    deepest = level
+    stack = [(obj, level, key, key_is_index, expand_depth, _ENTER)]
+    while stack:
+        if chunk_size and len(out) >= chunk_size:
+            yield
+        obj, level, key, key_is_index, expand_depth, phase = stack.pop()
+        if phase == _EMIT:
+            out.append(obj)
+            continue
+
+        t = type(obj)
+        if t is dict:
+            is_map, is_seq = True, False
+        elif t is list or t is tuple:
+            is_map, is_seq = False, True
+        elif t in _LEAF_TYPES:
+            is_map = is_seq = False
         else:
-            iterable = enumerate(obj)
-        for i, v in iterable:
-            if isinstance(v, Mapping):
-                rows.append(
-                    _to_html(
-                        v,
-                        expand_depth=max(expand_depth - 1, 0),
-                        level=level + 1,
-                        seen=seen,
-                        key=i,
-                        key_is_index=True,
-                        max_children=max_children,
-                        max_string_length=max_string_length,
-                    )
-                )
-            elif isinstance(v, Sequence) and not isinstance(v, (str, bytes, bytearray)):
-                rows.append(
-                    _to_html(
-                        v,
-                        expand_depth=max(expand_depth - 1, 0),
-                        level=level + 1,
-                        seen=seen,
-                        key=i,
-                        key_is_index=True,
-                        max_children=max_children,
-                        max_string_length=max_string_length,
+            is_map = isinstance(obj, Mapping)
+            is_seq = isinstance(obj, Sequence) and not isinstance(obj, (str, bytes, bytearray))
+
+        # Only track containers for circular refs
+        if (is_map or is_seq) and (seen is not None or level >= _UNCHECKED_MAX_LEVEL):
+            if seen is None:
+                seen = set()
+            oid = id(obj)
+            if oid in seen:
+                out.append('<div class="jt-leaf"><em>[Circular]</em></div>')
+                continue
+            seen.add(oid)
+
+        # ----- dict / list / tuple -----
+        # `_LAZY_SCRIPT` rebuilds deferred nodes with hand-written copies of this markup;
+        # nothing checks the two agree, so a change to any of the following must be
+        # made in the script too, or lazy output stops matching `lazy=False`:
+        #   - `_level_attrs`: `jt-l{n}` classes below `_LEVEL_CLASSES`, inline
+        #     `margin-left` (as Python formats `level * _INDENT_REM`) above
+        #   - `_key_prefix_html`: quoted, escaped string keys, `[i]` indices, no prefix
+        #     for None
+        #   - the container `<details class="jt-details...">` / `<summary>` head below,
+        #     its "{} Object " / "[] Array " label and "(shown/size)" count
+        #   - `_LEAF_OPEN` / `_LEAF_MID` / `_LEAF_CLOSE` rows and the "... N more
+        #     item(s)" footer
+        #   - `_fmt_primitive` for untruncated strings, bools, None and safe ints, and
+        #     `_escape_text` (the other leaves are sent pre-rendered, see `_lazy_encode`)
+        #   - `_LAZY_PLACEHOLDER`, which the script removes by its `jt-lazy` class
+        if is_map or is_seq:
+            size = len(obj)
+            visible = size
+            if max_children is not None and max_children >= 0:
+                visible = min(size, max_children)
+            open_attr = " open" if expand_depth > 0 else ""
+            lazy_node = None
+            eager = phase == _ENTER_EAGER
+            if deferred is not None and not eager and expand_depth <= 0 and size and seen is None:
+                encoded = _lazy_encode(obj, level, max_children, max_string_length)
+                if encoded is not None:
+                    lazy_node, lazy_deepest = encoded
+                    if lazy_deepest > deepest:
+                        deepest = lazy_deepest
+                    open_attr = f' data-jt-lazy="{len(deferred)}"'
+                    deferred.append([level, lazy_node])
+                else:
+                    # Collapsed descendants would walk the same too-deep branch again,
+                    # so the whole subtree is rendered eagerly.
+                    eager = True
+            child_enter = _ENTER_EAGER if eager else _ENTER
+            # If this node is a child, show its key/index inline in the summary
+            label = "{} Object " if is_map else "[] Array "
+            count_display = f"{visible}/{size}" if visible != size else str(size)
+            child_attrs = _level_attrs(level + 1)
+            leaf_open = _LEAF_OPEN + child_attrs + _LEAF_MID
+            if level + 1 > deepest:
+                deepest = level + 1
+            out.append(
+                f'<details class="jt-details{_level_attrs(level)}{open_attr}>'
+                f'<summary class="jt-summary">{_key_prefix_html(key, key_is_index)}{label}'
+                f'<span class="jt-punct">({count_display})</span></summary>'
+            )
+            if lazy_node is not None:
+                out.append(_LAZY_PLACEHOLDER % child_attrs)
+                continue
+            pending = None
+            child_depth = max(expand_depth - 1, 0)
+            start = 0
+            is_array = t is list or t is tuple
+            if is_array and set(map(type, islice(obj, visible))) <= _NUMBER_TYPES:
+                # Homogeneous numeric array (a data column): no per-item dispatch needed.
+                # Rows go out in slices so a streaming caller can drain `out` in between.
+                for lo in range(0, visible, _STREAM_CHUNK):
+                    _emit_number_rows(obj, lo, min(lo + _STREAM_CHUNK, visible), leaf_open, out)
+                    if chunk_size and len(out) >= chunk_size:
+                        yield
+                start = visible
+            elif (
+                is_array
+                and seen is None
+                and (deferred is None or eager or child_depth > 0)
+                and level + 1 < _UNCHECKED_MAX_LEVEL
+            ):
+                # List of records: render rows from a generated template until one doesn't
+                # fit, then let the general loop below take over from there.
+                table_keys = _table_keys(obj, visible, max_children)
+                if table_keys is not None:
+                    # Each record is a <details> at `level + 1` with its cells one deeper.
+                    if level + 2 > deepest:
+                        deepest = level + 2
+                    numeric = tuple(type(c) in _NUMBER_TYPES for c in obj[0].values())
+                    row_html = _row_template(table_keys, numeric, level + 1, child_depth > 0, max_string_length)
+                    while start < visible:
+                        stop = min(start + _STREAM_CHUNK, visible)
+                        start = _emit_table_rows(obj, start, stop, table_keys, row_html, out)
+                        if start < stop:
+                            break
+                        if chunk_size and len(out) >= chunk_size:
+                            yield
+            # Build children. Primitive rows are emitted straight away until the first
+            # container child; from then on everything is deferred onto the stack so
+            # that the container's subtree lands before its following siblings.
+            child_is_index = not is_map
+            children = obj.items() if is_map else enumerate(obj)
+            if start:
+                # A fast path emitted the first `start` rows. When it covered them all,
+                # skip the loop rather than have `islice` enumerate and discard each one.
+                children = islice(children, start, visible) if start < visible else ()
+            elif visible < size:
+                children = islice(children, visible)
+            for k, v in children:
+                t = type(v)
+                if t is dict or t is list or t is tuple or (t not in _LEAF_TYPES and _is_container(v)):
+                    # child container: put key in child's <summary>, indent that <details>
+                    entry = (v, level + 1, k, child_is_index, child_depth, child_enter)
+                else:
+                    # primitive child -> single line
+                    leaf = None
+                    cacheable = (
+                        is_map
+                        and type(k) is str
+                        and (
+                            (t is str and len(v) <= leaf_cache_str_len)
+                            or (t is not str and t in _LEAF_TYPES and (t is not float or (v == v and v != 0)))
+                        )
                     )
+                    if cacheable:
+                        cache_key = (level, k, t, v)
+                        leaf = _leaf_cache.get(cache_key)
+                    if leaf is None:
+                        leaf = (
+                            f"{leaf_open}{_key_prefix_html(k, child_is_index)}"
+                            f"{_fmt_primitive(v, max_string_length)}{_LEAF_CLOSE}"
+                        )
+                        if cacheable and len(_leaf_cache) < _LEAF_CACHE_SIZE:
+                            _leaf_cache[cache_key] = leaf
+                    if pending is None:
+                        out.append(leaf)
+                        if chunk_size and len(out) >= chunk_size:
+                            yield
+                        continue
+                    entry = (leaf, level + 1, None, False, 0, _EMIT)
+                if pending is None:
+                    pending = []
+                pending.append(entry)
+            closing = "</details>"
+            if size > visible:
+                remaining = size - visible
+                closing = (
+                    f'<div class="jt-more{child_attrs}>'
+                    f"<em>... {remaining} more item{'s' if remaining != 1 else ''}</em></div></details>"
                 )
+            if pending is None:
+                out.append(closing)
             else:
-                rows.append(
-                    f'<div class="jt-leaf" style="margin-left:{(level + 1) * _INDENT_REM}rem">'
-                    f"{key_prefix_html(i, True)}{fmt_primitive(v)}</div>"
-                )
-        if size > visible:
-            remaining = size - visible
-            rows.append(
-                f'<div class="jt-more" style="margin-left:{(level + 1) * _INDENT_REM}rem">'
-                f"<em>... {remaining} more item{'s' if remaining != 1 else ''}</em></div>"
-            )
-        return (
-            f'<details class="jt-details"{open_attr} style="margin-left:{level * _INDENT_REM}rem">'
-            f'<summary class="jt-summary">{summary_label}</summary>'
-            + "".join(rows)
-            + "</details>"
-        )
+                pending.append((closing, level, None, False, 0, _EMIT))
+                stack.extend(reversed(pending))
+            continue
 
-    # ----- primitive leaf -----
-    # (Root can be primitive if called directly.)
-    if key is not None:
-        return (
-            f'<div class="jt-leaf" style="margin-left:{level * _INDENT_REM}rem">'
-            f"{key_prefix_html(key, key_is_index)}{fmt_primitive(obj)}</div>"
-        )
-    return f'<div class="jt-leaf" style="margin-left:{level * _INDENT_REM}rem">{fmt_primitive(obj)}</div>'
+        # ----- primitive leaf -----
+        # (Root can be primitive if called directly.)
+        out.append(_LEAF_OPEN)
+        out.append(_level_attrs(level))
+        out.append(_LEAF_MID)
+        out.append(_key_prefix_html(key, key_is_index))
+        out.append(_fmt_primitive(obj, max_string_length))
+        out.append(_LEAF_CLOSE)
+    return deepest
 
 
 def json_to_html_tree(
@@ -265,6 +829,8 @@ def json_to_html_tree(
     expand_depth: int = 1,
     max_children: int = 100,
     max_string_length: int = 2000,
+    check_cycles: bool = False,
+    lazy: bool = False,
 ):
     """
     Convert a Python object to an interactive HTML tree representation.
@@ -284,6 +850,20 @@ def json_to_html_tree(
         If exceeded, remaining items will be summarized.
     max_string_length : int, default=2000
         The maximum length of strings to display before truncating.
+    check_cycles : bool, default=False
+        Detect containers that reference themselves (directly or indirectly) and
+        render them as ``[Circular]``; a container shared between several parents is
+        likewise rendered in full only once. Not needed for ``json.loads`` output.
+        Without it, shared containers are rendered in full wherever they occur, which
+        grows exponentially when shared subtrees nest; tracking also starts by itself
+        once nesting reaches 256 levels and then stays on for the rest of the document.
+        Use ``check_cycles=True`` for hand-built data with shared subtrees.
+    lazy : bool, default=False
+        Omit the contents of initially collapsed nodes from the HTML; a small embedded
+        script renders them when they are first opened. Where scripts are stripped or
+        not run (untrusted notebooks, GitHub previews), collapsed nodes then show only
+        "...", so the default renders every node up front. Ignored when ``check_cycles``
+        is set.
     Returns
     -------
     str
@@ -296,51 +876,122 @@ def json_to_html_tree(
 
     """
     uid = f"jt-{uuid.uuid4().hex[:8]}"
-    body = _to_html(
+    deferred = [] if lazy else None
+    out = [None, f'<div id="{uid}" class="jt">']
+    walker = _to_html(
         obj,
+        out,
         expand_depth=expand_depth,
         level=0,
-        seen=set(),
+        seen=set() if check_cycles else None,
         key=key,
         key_is_index=False,
         max_children=max_children,
         max_string_length=max_string_length,
+        deferred=deferred,
     )
-    style = f"""
-<style>
-#{uid} {{
-  font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace;
-  font-size: 13px; line-height: 1.45;
-}}
-#{uid} summary {{
-  cursor: pointer;
-  list-style: none;
-  display: inline-flex;
-  align-items: baseline;
-  gap: 0.25rem;
-}}
-#{uid} summary::-webkit-details-marker {{ display: none; }}
-#{uid} .jt-summary::before {{
-  content: "▸";
-  display: inline-block;
-  width: 1em;
-  color: #94a3b8;
-}}
-#{uid} details[open] > .jt-summary::before {{ content: "▾"; }}
-
-#{uid} .jt-key   {{ color: #1f2937; }}
-#{uid} .jt-punct {{ color: #94a3b8; }}
-#{uid} .jt-str   {{ color: #059669; }}
-#{uid} .jt-str-trunc {{ color: #dc2626; }}
-#{uid} .jt-num   {{ color: #b45309; }}
-#{uid} .jt-bool  {{ color: #2563eb; }}
-#{uid} .jt-null  {{ color: #dc2626; }}
-#{uid} .jt-more  {{ color: #94a3b8; }}
-@media (prefers-color-scheme: dark) {{
-  #{uid} .jt-key {{ color: #e5e7eb; }}
-  #{uid} .jt-str-trunc {{ color: #f87171; }}
-  #{uid} .jt-more {{ color: #64748b; }}
-}}
-</style>
-"""
-    return style + f'<div id="{uid}" class="jt">{body}</div>'
+    # No chunk_size, so the walker finishes in a single step. The stylesheet is filled
+    # in afterwards, once the deepest indentation level is known.
+    try:
+        next(walker)
+    except StopIteration as done:
+        deepest = done.value
+    out[0] = _STYLE_TEMPLATE % {"uid": uid, "levels": _level_rules(uid, deepest)}
+    if deferred:
+        out.append(_lazy_scripts_html(uid, deferred))
+    out.append("</div>")
+    return "".join(out)
+
+
+def json_to_html_tree_bytes(
+    obj,
+    *,
+    key: Optional[str] = None,
+    expand_depth: int = 1,
+    max_children: int = 100,
+    max_string_length: int = 2000,
+    check_cycles: bool = False,
+    lazy: bool = False,
+) -> bytes:
+    """
+    Like `json_to_html_tree`, but return the HTML encoded as UTF-8 bytes.
+
+    The document is rendered in chunks (see `_iter_html`) that are encoded into a single
+    buffer as they are produced, so only about one chunk of the HTML is held as a `str`
+    at a time, and peak memory stays close to the size of the result. Use this when the
+    result goes to a file, socket or HTTP response rather than to a notebook.
+
+    Parameters
+    ----------
+    obj : Any
+        The Python object to convert to an HTML tree.
+    key, expand_depth, max_children, max_string_length, check_cycles, lazy
+        As for `json_to_html_tree`.
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded HTML document.
+    """
+    # `BytesIO.getvalue()` hands over its buffer without a copy, unlike `b"".join` over
+    # a list of encoded chunks or `bytes(bytearray)`.
+    buf = io.BytesIO()
+    for chunk in _iter_html(
+        obj,
+        key=key,
+        expand_depth=expand_depth,
+        max_children=max_children,
+        max_string_length=max_string_length,
+        check_cycles=check_cycles,
+        lazy=lazy,
+    ):
+        buf.write(chunk.encode("utf-8"))
+    return buf.getvalue()
+
+
+def _iter_html(
+    obj,
+    *,
+    key: Optional[str] = None,
+    expand_depth: int = 1,
+    max_children: int = 100,
+    max_string_length: int = 2000,
+    check_cycles: bool = False,
+    lazy: bool = False,
+) -> Iterator[str]:
+    """
+    Like `json_to_html_tree`, but yield the document as a series of string chunks.
+
+    The deepest indentation level is only known once the walk is done, so the `jt-l*`
+    rules follow in a second <style> inside the root element, at the end.
+    """
+    uid = f"jt-{uuid.uuid4().hex[:8]}"
+    deferred = [] if lazy else None
+    yield _STYLE_TEMPLATE % {"uid": uid, "levels": ""}
+    out = [f'<div id="{uid}" class="jt">']
+    walker = _to_html(
+        obj,
+        out,
+        expand_depth=expand_depth,
+        level=0,
+        seen=set() if check_cycles else None,
+        key=key,
+        key_is_index=False,
+        max_children=max_children,
+        max_string_length=max_string_length,
+        chunk_size=_STREAM_CHUNK,
+        deferred=deferred,
+    )
+    while True:
+        try:
+            next(walker)
+        except StopIteration as done:
+            deepest = done.value
+            break
+        yield "".join(out)
+        out.clear()
+    out.append(f"<style>\n{_level_rules(uid, deepest)}</style>")
+    if deferred:
+        out.append(_lazy_scripts_html(uid, deferred))
+    out.append("</div>")
+    yield "".join(out)